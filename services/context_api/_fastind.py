@@ -0,0 +1,54 @@
+from __future__ import annotations
+import numpy as np
+
+# Optional Numba JIT for the indicator kernels. Without numba the same loops
+# run as plain Python, so results are identical either way.
+try:
+    from numba import njit
+except Exception:  # numba not installed
+    def njit(*args, **kwargs):
+        if args and callable(args[0]):
+            return args[0]
+        return lambda f: f
+
+@njit(cache=True, fastmath=True)
+def atr_norm_np(h: np.ndarray, l: np.ndarray, c: np.ndarray, n: int) -> float:
+    """Mean true range of the last n bars divided by the last close (aligned arrays, len > n)."""
+    m = c.shape[0]
+    acc = 0.0
+    for i in range(m - n, m):
+        pc = c[i - 1]
+        tr = h[i] - l[i]
+        up = abs(h[i] - pc)
+        dn = abs(l[i] - pc)
+        if up > tr: tr = up
+        if dn > tr: tr = dn
+        acc += tr
+    last = c[m - 1]
+    return acc / n / last if last != 0.0 else 0.0
+
+@njit(cache=True)
+def ret_np(c: np.ndarray, delta: int) -> float:
+    """Simple return over the last delta bars (len > delta)."""
+    c0 = c[c.shape[0] - delta - 1]
+    return (c[c.shape[0] - 1] - c0) / c0 if c0 != 0.0 else 0.0
+
+@njit(cache=True)
+def above_sma_np(c: np.ndarray, n: int) -> bool:
+    """Last close strictly above the n-bar simple moving average (len >= n)."""
+    m = c.shape[0]
+    acc = 0.0
+    for i in range(m - n, m):
+        acc += c[i]
+    return c[m - 1] > acc / n
+
+def warm_kernels() -> None:
+    """Compile (or load cached) every kernel for writable and read-only float64 arrays."""
+    # read-only: cached Tiingo candles; writable: edge-padded and synthetic bars
+    a = np.linspace(100.0, 101.0, 21)
+    ro = a.copy()
+    ro.flags.writeable = False
+    for x in (a, ro):
+        atr_norm_np(x, x, x, 20)
+        ret_np(x, 5)
+        above_sma_np(x, 20)
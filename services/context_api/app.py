@@ -1,15 +1,29 @@
 from __future__ import annotations
 from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel
-from datetime import datetime, timezone
-from typing import List, Optional, Dict, Any
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel, ConfigDict
+import time
+from typing import List, Dict, Any
 
+from ._fastind import warm_kernels
 from .features import build_features_stub, build_features_for
+from .http_client import ACLIENT, ACLIENT_ENV
 
-app = FastAPI(title="MIDAS Context API", version="v1")
+app = FastAPI(title="MIDAS Context API", version="v1", default_response_class=ORJSONResponse)
+
+@app.on_event("startup")
+def _warm_indicators():
+    # JIT-compile (or load cached) indicator kernels off the request path, for the
+    # writable and read-only array types the feature build passes in
+    warm_kernels()
+
+@app.on_event("shutdown")
+async def _close_client():
+    await ACLIENT.aclose()
+    await ACLIENT_ENV.aclose()
 
 def ts_utc_now() -> str:
-    return datetime.now(timezone.utc).isoformat(timespec="seconds").replace("+00:00", "Z")
+    return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
 
 @app.get("/healthz")
 def healthz():
@@ -20,12 +34,11 @@ def features_stub(ticker: str):
     return {"features": build_features_stub(), "ticker": ticker, "ts": ts_utc_now()}
 
 @app.get("/api/features/v2")
-def features_v2(ticker: str):
+async def features_v2(ticker: str):
     try:
-        payload = build_features_for(ticker)
-        payload["ticker"] = ticker
-        payload["ts"] = ts_utc_now()
-        return payload
+        # shallow copy: the payload may be the cached dict; keep its build ts so
+        # consumers can tell how old a stale-while-revalidate hit is
+        return {**await build_features_for(ticker), "ticker": ticker}
     except Exception as e:
         # degrade gracefully
         return {"features": build_features_stub(), "ticker": ticker, "ts": ts_utc_now(), "error": str(e)}
@@ -33,52 +46,48 @@ def features_v2(ticker: str):
 # ------- One-liner builder -------
 
 class OneLinerIn(BaseModel):
+    model_config = ConfigDict(extra="ignore", frozen=True)
+
     class_: str
     confidence: float
     title: str = ""
     publisher: str = ""
     url: str = ""
-    refs: Optional[List[Optional[Dict[str, str]]]] = None  # up to 3 refs; may include None
+    refs: list[dict[str, str] | None] | None = None  # up to 3 refs; may include None; null accepted
+
+_STRATEGY_PHRASES: dict[str, str] = {
+    "IRON_CONDOR": "Range-bound, IV watch",
+    "DEBIT_CALL": "Bullish, defined risk",
+    "DEBIT_PUT": "Bearish, defined risk",
+    "COVERED_CALL": "Income; upside capped",
+    "NO_ACTION": "Signal unclear",
+}
+_LEN_LIMIT = 180
+_SUFFIX_BY_N = ("", " ([1])", " ([1][2])", " ([1][2][3])")  # by count of linked refs
 
 def _strategy_phrase(cls: str) -> str:
-    m = {
-        "IRON_CONDOR": "Range-bound, IV watch",
-        "DEBIT_CALL": "Bullish, defined risk",
-        "DEBIT_PUT": "Bearish, defined risk",
-        "COVERED_CALL": "Income; upside capped",
-        "NO_ACTION": "Signal unclear",
-    }
-    return m.get(cls, "Review setup")
-
-def _build_index_suffix(refs: Optional[List[Optional[Dict[str,str]]]]) -> tuple[str, List[Dict[str, Any]]]:
+    return _STRATEGY_PHRASES.get(cls, "Review setup")
+
+def _build_index_suffix(refs: list[dict[str, str] | None] | None) -> tuple[str, List[Dict[str, Any]]]:
     """Return text like '([1][2][3])' and an array mapping of numbers to urls."""
-    if not refs:
-        return "", []
-    nums = []
-    shown = []
-    n = 1
-    for slot in refs[:3]:
-        if slot and slot.get("url"):
-            nums.append(f"[{n}]")
-            shown.append({"n": n, "url": slot.get("url")})
-            n += 1
-    if not nums:
-        return "", []
-    return f" ({''.join(nums)})", shown
+    urls = [url for slot in (refs or [])[:3] if slot and (url := slot.get("url"))]
+    return _SUFFIX_BY_N[len(urls)], [{"n": n, "url": u} for n, u in enumerate(urls, 1)]
 
 @app.post("/api/one_liner")
 def one_liner(x: OneLinerIn):
     # prefix: strategy + confidence
     conf_pct = int(round((x.confidence or 0.0) * 100))
     phrase = _strategy_phrase(x.class_)
-    base = f"{phrase}. Source: {(x.publisher or 'News')} —".strip()
+    publisher = x.publisher or "News"
 
     # indices
     suffix, refs_numbers = _build_index_suffix(x.refs)
 
-    # Compose and clamp to 180 chars
-    text = f"{base}{suffix}"
-    if len(text) > 180:
-        text = (text[:177] + "…")
+    # Clamp to _LEN_LIMIT by trimming the publisher (the only free-length part)
+    # before composing, so the text is built once in a single buffer.
+    fixed = len(phrase) + len(". Source: ") + len(" —") + len(suffix)
+    if fixed + len(publisher) > _LEN_LIMIT:
+        publisher = publisher[:max(0, _LEN_LIMIT - fixed - 1)] + "…"
+    text = "".join((phrase, ". Source: ", publisher, " —", suffix))
 
     return {"text": text, "refs_numbers": refs_numbers}
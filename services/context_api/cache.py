@@ -1,57 +1,70 @@
 from __future__ import annotations
 import os, time
-from typing import Dict, Tuple, Optional
+from collections import OrderedDict
+from typing import Tuple, Optional
 
-# Simple in-proc cache: ticker -> (epoch_secs, payload_dict)
-_CACHE: Dict[str, Tuple[float, dict]] = {}
+# Simple in-proc LRU: ticker -> (epoch_secs, payload_dict)
+_CACHE: OrderedDict[str, Tuple[float, dict]] = OrderedDict()
+MAX_ENTRIES = 1024
 
-# Default 45s; override with CONTEXT_TTL_S
+# Stale-while-revalidate: fresh for TTL_S (default 45s; CONTEXT_TTL_S), then
+# served stale while a background refresh runs, up to HARD_TTL_S (CONTEXT_HARD_TTL_S).
 TTL_S = float(os.getenv("CONTEXT_TTL_S", "45"))
+# never below TTL_S, or entries would expire before they ever go stale
+HARD_TTL_S = max(float(os.getenv("CONTEXT_HARD_TTL_S", "180")), TTL_S)
 
-def get_cached(ticker: str) -> Optional[dict]:
-    """Return cached payload if fresh, else None."""
-    key = (ticker or "").upper().strip()
+def _norm(ticker: str) -> str:
+    return (ticker or "").upper().strip()
+
+def get_entry(ticker: str) -> Optional[Tuple[float, dict]]:
+    """Return (age_s, payload) if younger than HARD_TTL_S, else None."""
+    key = _norm(ticker)
     if not key:
         return None
     hit = _CACHE.get(key)
     if not hit:
         return None
     ts_epoch, payload = hit
-    if (time.time() - ts_epoch) <= TTL_S:
-        # annotate (optional)
-        payload.setdefault("_cache", {})["age_s"] = int(time.time() - ts_epoch)
-        payload["_cache"]["ttl_s"] = int(TTL_S)
-        payload["_cache"]["hit"] = True
-        return payload
-    # stale
-    _CACHE.pop(key, None)
-    return None
+    age = time.time() - ts_epoch
+    if age > HARD_TTL_S:
+        _CACHE.pop(key, None)
+        return None
+    _CACHE.move_to_end(key)
+    # annotate (optional)
+    payload.setdefault("_cache", {})["age_s"] = int(age)
+    payload["_cache"]["ttl_s"] = int(TTL_S)
+    payload["_cache"]["hit"] = True
+    payload["_cache"]["stale"] = age > TTL_S
+    return age, payload
 
 def put_cached(ticker: str, payload: dict) -> None:
-    key = (ticker or "").upper().strip()
+    key = _norm(ticker)
     if not key or not isinstance(payload, dict):
         return
     _CACHE[key] = (time.time(), payload)
+    _CACHE.move_to_end(key)
+    while len(_CACHE) > MAX_ENTRIES:
+        _CACHE.popitem(last=False)
 
 # --------------------------------------------------------------------
 # Simple TTL decorator used by providers_tiingo and others
 # --------------------------------------------------------------------
 import functools
 
-def ttl_cache(ttl_seconds=60):
-    """Basic in-memory time-based cache decorator."""
+def attl_cache(ttl_seconds=60):
+    """Basic in-memory time-based cache decorator for coroutine providers."""
     def decorator(func):
         cache = {}
 
         @functools.wraps(func)
-        def wrapper(*args, **kwargs):
+        async def wrapper(*args, **kwargs):
             key = (args, tuple(sorted(kwargs.items())))
             now = time.time()
             if key in cache:
                 value, ts = cache[key]
                 if now - ts < ttl_seconds:
                     return value
-            value = func(*args, **kwargs)
+            value = await func(*args, **kwargs)
             cache[key] = (value, now)
             return value
 
@@ -1,64 +1,126 @@
 from __future__ import annotations
+import asyncio
 import os
-from collections import deque
-from datetime import datetime, timezone, timedelta
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timezone
+from itertools import chain
 from typing import Optional, Dict, Any, List
 
-import httpx
+import numpy as np
+import orjson
 
-from .cache import get_cached, put_cached
-from .indicators import atr_normalized, ret_pct, above_sma20
+from ._fastind import atr_norm_np, ret_np, above_sma_np
+from .cache import _norm, get_entry, put_cached, TTL_S
+from .http_client import ACLIENT
 from .providers_finnhub import (
-    fetch_headlines, FHError,
-    fetch_earnings_date as fetch_earnings_finnhub,
-    fetch_quote_finnhub,
+    fetch_headlines_async, FHError,
+    fetch_earnings_date_async as fetch_earnings_finnhub_async,
+    fetch_quote_finnhub_async,
 )
-from .providers_tiingo import fetch_candles_tiingo, fetch_quote_tiingo, TiError
-from .providers_yahoo import fetch_headlines_yahoo
-
-_QUOTE_RING: dict[str, deque[tuple[datetime, float]]] = {}
+from .providers_tiingo import fetch_candles_tiingo_async, fetch_quote_tiingo_async, TiError
+from .providers_yahoo import fetch_headlines_yahoo_async
+
+class _QuoteRing:
+    """Recent quotes for one ticker: parallel float arrays, ts ascending."""
+    __slots__ = ("ts", "px", "last_cull")
+
+    def __init__(self) -> None:
+        self.ts = array("d")    # epoch seconds
+        self.px = array("d")    # last price
+        self.last_cull = 0.0    # epoch of last time-based trim
+
+_QUOTE_RING: dict[str, _QuoteRing] = {}
+_RING_MAX = 600
+_RING_SPAN_S = 600.0
+_RING_CULL_EVERY_S = 30.0
 SENT_URL = os.getenv("SENT_URL", "http://127.0.0.1:8016")
-
-def iso_now() -> str:
-    return datetime.now(timezone.utc).isoformat(timespec="seconds").replace("+00:00","Z")
-
-def _parse_iso_aware(s: str) -> datetime:
-    if not s: return datetime.now(timezone.utc)
-    s2 = s.replace("Z", "+00:00")
-    try: d = datetime.fromisoformat(s2)
-    except Exception: return datetime.now(timezone.utc)
+SENT_BATCH_WINDOW_S = float(os.getenv("SENT_BATCH_WINDOW_S", "0.005"))
+class _KeyLock:
+    """Per-ticker refresh lock plus the number of coroutines holding or awaiting it."""
+    __slots__ = ("lock", "users")
+
+    def __init__(self) -> None:
+        self.lock = asyncio.Lock()
+        self.users = 0
+
+_LOCKS: dict[str, _KeyLock] = {}  # only tickers with a refresh in flight
+_REFRESHING: set[str] = set()  # tickers with a background refresh in flight
+_BUILDING: set[str] = set()    # tickers with a live provider build in flight
+# (ticker, titles, future) waiting for the next batched sentiment POST
+_SENT_PENDING: list[tuple[str, list[str], asyncio.Future]] = []
+_BACKGROUND: set[asyncio.Task] = set()
+
+def iso_now(now: Optional[float] = None) -> str:
+    # gmtime(None) is the current time; formats straight to 'YYYY-MM-DDTHH:MM:SSZ'
+    return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(now))
+
+def _parse_epoch(s: str, now: float) -> float:
+    """Feed timestamp -> UTC epoch secs; naive times are UTC, unparseable means now."""
+    if not s: return now
+    # C-level parser; accepts a trailing 'Z' on 3.11+, so no replace() needed
+    try: d = datetime.fromisoformat(s)
+    except Exception: return now
     if d.tzinfo is None: d = d.replace(tzinfo=timezone.utc)
-    return d.astimezone(timezone.utc)
+    return d.timestamp()
 
-def _note_quote(ticker: str, last: float) -> None:
-    ring = _QUOTE_RING.setdefault(ticker, deque(maxlen=600))
-    ring.append((datetime.now(timezone.utc), float(last)))
-    cut = datetime.now(timezone.utc) - timedelta(minutes=10)
-    while ring and ring[0][0] < cut:
-        ring.popleft()
-
-def _ret_from_ring(ticker: str, minutes: int) -> float:
+def _note_quote(ticker: str, last: float, now: float) -> None:
+    ring = _QUOTE_RING.get(ticker)
+    if ring is None:
+        ring = _QUOTE_RING[ticker] = _QuoteRing()
+    ts, px = ring.ts, ring.px
+    ts.append(now)
+    px.append(float(last))
+    # Trim in batches: only when full or every _RING_CULL_EVERY_S; readers skip the
+    # few expired entries that may linger in between.
+    if len(ts) <= _RING_MAX and now - ring.last_cull < _RING_CULL_EVERY_S:
+        return
+    ring.last_cull = now
+    drop = max(bisect_left(ts, now - _RING_SPAN_S), len(ts) - _RING_MAX)
+    if drop > 0:
+        del ts[:drop]
+        del px[:drop]
+
+def _ret_from_ring(ticker: str, minutes: int, now: float) -> float:
     ring = _QUOTE_RING.get(ticker)
-    if not ring: return 0.0
-    cutoff = datetime.now(timezone.utc) - timedelta(minutes=minutes)
-    base = None
-    for ts, px in reversed(ring):
-        base = px
-        if ts <= cutoff: break
-    if base is None or base == 0.0: return 0.0
-    last = ring[-1][1]
-    return (last - base) / base if base else 0.0
+    if ring is None or not ring.ts: return 0.0
+    # newest quote at or before the cutoff, else the oldest one inside the window
+    ts = ring.ts
+    lo = bisect_left(ts, now - _RING_SPAN_S)
+    if lo == len(ts): return 0.0
+    idx = bisect_right(ts, now - minutes * 60) - 1
+    base = ring.px[max(idx, lo)]
+    if base == 0.0: return 0.0
+    last = ring.px[-1]
+    return (last - base) / base
+
+def _features_from_np(highs: np.ndarray, lows: np.ndarray, closes: np.ndarray, last_px: float) -> tuple[Optional[float], Optional[float], float, bool]:
+    """(r_1m, r_5m, rv20, above_sma20) from aligned bar arrays; a return is None when the series is too short."""
+    r_1m = float(ret_np(closes, 1)) if closes.size >= 2 else None
+    r_5m = float(ret_np(closes, 5)) if closes.size >= 6 else None
+
+    h, l, c = highs[-120:], lows[-120:], closes[-120:]
+    if c.size == 0:
+        h = l = c = np.array([last_px], dtype=np.float64)
+    if c.size < 21:
+        pad = (21 - c.size, 0)
+        h = np.pad(h, pad, mode="edge")
+        l = np.pad(l, pad, mode="edge")
+        c = np.pad(c, pad, mode="edge")
+
+    return r_1m, r_5m, float(atr_norm_np(h, l, c, 20)), bool(above_sma_np(c, 20))
+
+_SYN_CLOSES = np.array([100,101,102,103,103,104,105,104,103,102,103,104,103,102,101,100,99,99,100,101,102], dtype=np.float64)
+_SYN_HIGHS  = np.array([101,102,103,104,104,105,106,105,104,103,104,105,104,103,102,101,100,100,101,102,103], dtype=np.float64)
+_SYN_LOWS   = np.array([ 99,100,101,102,102,103,104,103,102,101,102,103,102,101,100, 99, 98, 98, 99,100,101], dtype=np.float64)
 
 def _synthetic_feats() -> dict:
-    closes = [100,101,102,103,103,104,105,104,103,102,103,104,103,102,101,100,99,99,100,101,102]
-    highs  = [101,102,103,104,104,105,106,105,104,103,104,105,104,103,102,101,100,100,101,102,103]
-    lows   = [ 99,100,101,102,102,103,104,103,102,101,102,103,102,101,100, 99, 98, 98, 99,100,101]
-    rv20 = atr_normalized(highs, lows, closes, 20)
-    r_1m = ret_pct(closes, 1); r_5m = ret_pct(closes, 5)
+    r_1m, r_5m, rv20, above = _features_from_np(_SYN_HIGHS, _SYN_LOWS, _SYN_CLOSES, 0.0)
     return {
         "sent_mean": 0.0, "sent_std": 0.05,
         "r_1m": float(r_1m), "r_5m": float(r_5m),
-        "above_sma20": bool(above_sma20(closes)),
+        "above_sma20": bool(above),
         "mins_since_news": 12,
         "rv20": float(min(max(rv20, 0.02), 0.80)),
         "earnings_soon": False,
@@ -68,70 +130,165 @@ def _synthetic_feats() -> dict:
 def build_features_stub() -> dict:
     return _synthetic_feats()
 
-def _sent_from_headlines(headlines: List[dict]) -> tuple[float, float]:
+def _spawn(coro) -> asyncio.Task:
+    """Fire-and-forget task, strongly referenced until it finishes."""
+    task = asyncio.create_task(coro)
+    _BACKGROUND.add(task)
+    task.add_done_callback(_BACKGROUND.discard)
+    return task
+
+def _take_pending() -> list[tuple[str, list[str], asyncio.Future]]:
+    batch = _SENT_PENDING[:]
+    _SENT_PENDING.clear()
+    return batch
+
+def _mean_std(d) -> Optional[tuple[float, float]]:
+    try:
+        return float(d.get("mean", 0.0)), float(d.get("std", 0.05))
+    except Exception:
+        return None
+
+async def _score_one(texts: list[str]) -> Optional[tuple[float, float]]:
+    try:
+        r = await ACLIENT.post(f"{SENT_URL}/api/sentiment", json={"texts": texts})
+        r.raise_for_status()
+        return _mean_std(orjson.loads(r.content))
+    except Exception:
+        return None
+
+async def _score_groups(groups: list[tuple[str, list[str]]]) -> list[Optional[tuple[float, float]]]:
+    """(mean, std) per (ticker, titles) group, in order; None where a group could not be scored."""
+    if len(groups) > 1:
+        r = await ACLIENT.post(f"{SENT_URL}/api/sentiment_batch",
+                               json={"groups": [{"id": t, "texts": texts} for t, texts in groups]})
+        if r.status_code != 404:
+            r.raise_for_status()
+            return [_mean_std(d) for d in orjson.loads(r.content).get("groups") or []]
+        # sentiment deploy predates the batch route: one concurrent POST per group
+    return list(await asyncio.gather(*[_score_one(texts) for _, texts in groups]))
+
+async def _flush_sentiment() -> None:
+    """Score every pending title group, batched into one POST when there are several."""
+    batch = None
+    try:
+        # only hold the batch open while other builds are in flight and may still join it
+        if len(_BUILDING) > 1:
+            await asyncio.sleep(SENT_BATCH_WINDOW_S)
+        batch = _take_pending()
+        try:
+            scores = await _score_groups([(t, texts) for t, texts, _ in batch])
+        except Exception:
+            scores = []
+        for (_, _, fut), sc in zip(batch, scores):
+            if sc is not None and not fut.done():
+                fut.set_result(sc)
+    finally:
+        # every waiter must resolve (callers hold the ticker's refresh lock); neutral on any
+        # failure. Cancelled inside the window: drain the queue so the next caller spawns a flush.
+        if batch is None:
+            batch = _take_pending()
+        for _, _, fut in batch:
+            if not fut.done():
+                fut.set_result((0.0, 0.05))
+
+async def _sent_from_headlines(ticker: str, headlines: List[dict]) -> tuple[float, float]:
     titles = [h.get("title","").strip() for h in (headlines or []) if h.get("title")]
     titles = [t for t in titles if t]
     if not titles: return 0.0, 0.05
-    try:
-        with httpx.Client(timeout=6.0, trust_env=False) as cli:
-            r = cli.post(f"{SENT_URL}/api/sentiment", json={"texts": titles[:8]})
-            r.raise_for_status()
-            d = r.json()
-            return float(d.get("mean", 0.0)), float(d.get("std", 0.05))
-    except Exception:
-        return 0.0, 0.05
+    # Coalesce with other tickers' builds in flight: one batched POST per window
+    fut = asyncio.get_running_loop().create_future()
+    _SENT_PENDING.append((ticker, titles[:8], fut))
+    if len(_SENT_PENDING) == 1:
+        _spawn(_flush_sentiment())
+    return await fut
 
 def _merge_refs(ticker: str, fn: List[dict], yh: List[dict]) -> List[dict]:
     """Merge finnhub + yahoo refs, de-dup by URL, keep order, take up to 3."""
-    seen = set()
-    out: List[dict] = []
-    for lst in (fn, yh):
-        for h in lst or []:
-            title = (h.get("title") or "").strip()
-            url   = (h.get("url")   or "").strip()
-            pub   = (h.get("publisher") or "").strip()
-            if not title or not url: continue
-            if url in seen: continue
-            seen.add(url)
-            out.append({"title": title, "publisher": pub or "News", "url": url})
-            if len(out) >= 3: break
-        if len(out) >= 3: break
-    return out
-
-def build_features_for(ticker: str) -> Dict[str, Any]:
+    seen: dict[str, dict] = {}
+    for h in chain(fn or (), yh or ()):
+        url = (h.get("url") or "").strip()
+        if not url or url in seen: continue
+        title = (h.get("title") or "").strip()
+        if not title: continue
+        seen[url] = {"title": title, "publisher": (h.get("publisher") or "").strip() or "News", "url": url}
+        if len(seen) == 3: break
+    return list(seen.values())
+
+async def build_features_for(ticker: str) -> Dict[str, Any]:
     live = os.getenv("LIVE_PROVIDERS") == "1"
-    error: Optional[str] = None
-    top_headline: Optional[dict] = None
 
-    if live:
-        cached = get_cached(ticker)
-        if cached:
-            return cached
-    else:
+    if not live:
         feats = _synthetic_feats()
         payload = {
             "features": feats,
-            "top_headline": top_headline,
+            "top_headline": None,
             "refs": [],
             "refs_sources": [],
-            "error": error,
+            "error": None,
             "quote": {"last": 0.0, "bid": None, "ask": None, "quality": "unknown"},
             "ts": iso_now(),
         }
         return payload
 
+    hit = get_entry(ticker)
+    if hit:
+        age, payload = hit
+        key = _norm(ticker)
+        if age > TTL_S and key not in _REFRESHING:
+            # serve stale now, revalidate once in the background
+            _REFRESHING.add(key)
+            _spawn(_refresh(ticker)).add_done_callback(lambda _: _REFRESHING.discard(key))
+        return payload
+    return await _refresh(ticker)
+
+async def _refresh(ticker: str) -> Dict[str, Any]:
+    # single-flight: concurrent refreshes for one ticker wait on a single provider fetch
+    key = _norm(ticker)
+    kl = _LOCKS.get(key)
+    if kl is None:
+        kl = _LOCKS[key] = _KeyLock()
+    kl.users += 1
     try:
+        async with kl.lock:
+            hit = get_entry(ticker)
+            if hit and hit[0] <= TTL_S:
+                return hit[1]
+            _BUILDING.add(key)
+            try:
+                return await _build_live(ticker)
+            finally:
+                _BUILDING.discard(key)
+    finally:
+        # drop the lock once nobody holds or waits on it, so _LOCKS stays bounded
+        kl.users -= 1
+        if not kl.users:
+            del _LOCKS[key]
+
+async def _build_live(ticker: str) -> Dict[str, Any]:
+    now = time.time()  # one clock read per build; threaded through the helpers below
+    error: Optional[str] = None
+    top_headline: Optional[dict] = None
+
+    try:
+        # ----- All independent provider calls in flight at once
+        fh, yh, quote_ti, candles, earn_iso = await asyncio.gather(
+            fetch_headlines_async(ticker, limit=5),
+            fetch_headlines_yahoo_async(ticker, limit=5),
+            fetch_quote_tiingo_async(ticker),
+            fetch_candles_tiingo_async(ticker, lookback_minutes=120, freq="1min"),
+            fetch_earnings_finnhub_async(ticker),
+            return_exceptions=True,
+        )
+
         # ----- Headlines: Finnhub -> Yahoo fallback; then merge to refs
-        fh: List[dict] = []
-        yh: List[dict] = []
-        try:
-            fh = fetch_headlines(ticker, limit=5)
-        except FHError as e:
-            error = f"news: {e}"
-        try:
-            yh = fetch_headlines_yahoo(ticker, limit=5)
-        except Exception as e:
-            error = (error + f"; yahoo: {e}") if error else f"yahoo: {e}"
+        if isinstance(fh, FHError):
+            error = f"news: {fh}"
+            fh = []
+        elif isinstance(fh, BaseException):
+            raise fh
+        if isinstance(yh, BaseException):
+            error = (error + f"; yahoo: {yh}") if error else f"yahoo: {yh}"
+            yh = []
 
         # choose top for legacy field
         if fh:
@@ -146,15 +303,18 @@ def build_features_for(ticker: str) -> Dict[str, Any]:
             refs.append(None)
 
         # ----- Sentiment
-        sent_mean, sent_std = _sent_from_headlines([r for r in (fh or [])[:3] if r] or [r for r in (yh or [])[:3] if r])
+        sent_mean, sent_std = await _sent_from_headlines(ticker, [r for r in (fh or [])[:3] if r] or [r for r in (yh or [])[:3] if r])
 
         # ----- Quotes + Candles (Tiingo primary)
-        quote_ti = fetch_quote_tiingo(ticker)
-        candles  = fetch_candles_tiingo(ticker, lookback_minutes=120, freq="1min")
+        if isinstance(quote_ti, BaseException):
+            raise quote_ti
+        if isinstance(candles, BaseException):
+            raise candles
 
+        closes = candles["close"]
         last_px = float(quote_ti.get("last") or 0.0)
-        if last_px == 0.0 and candles:
-            last_px = float(candles[-1]["close"])
+        if last_px == 0.0 and closes.size:
+            last_px = float(closes[-1])
 
         bid_disp = float(quote_ti.get("bid") or 0.0) or None
         ask_disp = float(quote_ti.get("ask") or 0.0) or None
@@ -163,14 +323,14 @@ def build_features_for(ticker: str) -> Dict[str, Any]:
         # Fallback: Finnhub last if Tiingo last missing
         if last_px <= 0.0:
             try:
-                qfh = fetch_quote_finnhub(ticker)
+                qfh = await fetch_quote_finnhub_async(ticker)
                 if qfh.get("last"):
                     last_px = float(qfh["last"])
             except Exception:
                 pass
         if last_px <= 0.0: last_px = 1.0
 
-        _note_quote(ticker, last_px)
+        _note_quote(ticker, last_px, now)
 
         # If B/A still missing or invalid, estimate tight spread (~8 bps)
         if bid_disp is None or ask_disp is None or (ask_disp is not None and bid_disp is not None and ask_disp <= bid_disp):
@@ -186,52 +346,36 @@ def build_features_for(ticker: str) -> Dict[str, Any]:
             pool = (fh or []) + (yh or [])
             pool = [p for p in pool if p.get("ts")]
             if pool:
-                latest = max(_parse_iso_aware(p["ts"]) for p in pool)
-                mins_since_news = int((datetime.now(timezone.utc) - latest).total_seconds() // 60)
+                latest = max(_parse_epoch(p["ts"], now) for p in pool)
+                mins_since_news = int((now - latest) // 60)
         mins_since_news = min(int(mins_since_news), 240)
 
-        # ----- Returns & rv20 with padding
-        if candles and len(candles) >= 2:
-            closes = [c["close"] for c in candles]
-            highs  = [c["high"]  for c in candles]
-            lows   = [c["low"]   for c in candles]
-            r_1m = ret_pct(closes, 1) if len(closes) >= 2 else _ret_from_ring(ticker, 1)
-            r_5m = ret_pct(closes, 5) if len(closes) >= 6 else _ret_from_ring(ticker, 5)
-            def _pad(series: list[float], n: int, pad_val: float) -> list[float]:
-                return series + [pad_val] * max(0, n - len(series))
-            series = closes[-120:] if closes else []
-            if len(series) < 21:
-                pad_val = series[-1] if series else last_px
-                series = _pad(series, 21, pad_val)
-            else:
-                pad_val = series[-1]
-            hseg = (highs or [pad_val])[-len(series):]
-            lseg = (lows  or [pad_val])[-len(series):]
-            rv20 = atr_normalized(hseg, lseg, series, 20)
-            above = bool(series[-1] > sum(series[-20:]) / 20.0)
+        # ----- Returns & rv20 (vectorised; short series are edge-padded)
+        if closes.size >= 2:
+            r_1m, r_5m, rv20, above = _features_from_np(candles["high"], candles["low"], closes, last_px)
         else:
-            r_1m = _ret_from_ring(ticker, 1)
-            r_5m = _ret_from_ring(ticker, 5)
-            rv20  = atr_normalized([last_px]*21, [last_px]*21, [last_px]*21, 20)
-            above = False
+            empty = np.empty(0, dtype=np.float64)
+            r_1m, r_5m, rv20, above = _features_from_np(empty, empty, empty, last_px)
+        if r_1m is None: r_1m = _ret_from_ring(ticker, 1, now)
+        if r_5m is None: r_5m = _ret_from_ring(ticker, 5, now)
 
         rv20 = float(min(max(rv20, 0.02), 0.80))
 
         # ----- Earnings soon (≤14 days)
         earnings_soon = False
-        try:
-            earn_iso = fetch_earnings_finnhub(ticker)
-            if earn_iso:
-                ed = _parse_iso_aware(earn_iso).date()
-                today = datetime.now(timezone.utc).date()
-                earnings_soon = 0 <= (ed - today).days <= 14
-        except FHError:
-            pass
+        if isinstance(earn_iso, FHError):
+            earn_iso = None
+        elif isinstance(earn_iso, BaseException):
+            raise earn_iso
+        if earn_iso:
+            days = int(_parse_epoch(earn_iso, now) // 86400) - int(now // 86400)
+            earnings_soon = 0 <= days <= 14
 
         # ----- Liquidity (IEX-friendly)
         spread_bps = abs(ask_disp - bid_disp) / last_px * 1e4 if last_px else 9999
-        vol_1m = int(candles[-1]["volume"]) if candles else 0
-        vol_5m = sum(int(c["volume"]) for c in (candles[-5:] if candles else []))
+        vols = candles["volume"]
+        vol_1m = int(vols[-1]) if vols.size else 0
+        vol_5m = int(vols[-5:].sum())
         liquidity_flag = (spread_bps <= 30.0) or (vol_1m >= 1_000) or (vol_5m >= 5_000)
 
         feats = {
@@ -251,7 +395,7 @@ def build_features_for(ticker: str) -> Dict[str, Any]:
             "refs_sources": refs_sources,   # <= publishers list for tooltip if needed
             "error": error,
             "quote": {"last": float(last_px), "bid": float(bid_disp), "ask": float(ask_disp), "quality": quality},
-            "ts": iso_now(),
+            "ts": iso_now(now),
         }
         put_cached(ticker, payload)
         return payload
@@ -268,7 +412,7 @@ def build_features_for(ticker: str) -> Dict[str, Any]:
         "refs_sources": [],
         "error": error,
         "quote": {"last": 0.0, "bid": None, "ask": None, "quality": "unknown"},
-        "ts": iso_now(),
+        "ts": iso_now(now),
     }
     put_cached(ticker, payload)
     return payload
@@ -0,0 +1,25 @@
+from __future__ import annotations
+import httpx
+
+# Shared async clients for provider + sentiment calls.
+# Pooled per process: keep-alive connections are reused across
+# requests, and HTTPS providers negotiate HTTP/2 when they support it.
+_LIMITS = httpx.Limits(max_keepalive_connections=32)
+
+# Direct connections (Finnhub, local sentiment service): ignores proxy env vars.
+ACLIENT = httpx.AsyncClient(
+    http2=True,
+    timeout=6.0,
+    trust_env=False,
+    follow_redirects=True,
+    limits=_LIMITS,
+)
+
+# Tiingo + Yahoo: honours HTTP(S)_PROXY / NO_PROXY, as their requests-based fetchers did.
+ACLIENT_ENV = httpx.AsyncClient(
+    http2=True,
+    timeout=6.0,
+    trust_env=True,
+    follow_redirects=True,
+    limits=_LIMITS,
+)
@@ -1,4 +1,6 @@
 from __future__ import annotations
+# Plain NumPy reference indicators. The feature build runs the _fastind kernels;
+# tests/test_fastind.py checks them against these.
 import numpy as np
 from typing import Sequence
 
@@ -1,5 +1,6 @@
 from __future__ import annotations
 from typing import TypedDict, Optional, List
+import numpy as np
 
 class Headline(TypedDict):
     title: str
@@ -15,6 +16,15 @@ class Candle(TypedDict):
     close: float
     volume: int
 
+class CandleSeries(TypedDict):
+    """Struct-of-arrays bars, oldest first; all arrays share one length and are read-only."""
+    ts: np.ndarray      # float64 epoch seconds
+    open: np.ndarray    # float64
+    high: np.ndarray    # float64
+    low: np.ndarray     # float64
+    close: np.ndarray   # float64
+    volume: np.ndarray  # int64
+
 class Quote(TypedDict):
     last: float
     bid: float
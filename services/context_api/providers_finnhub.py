@@ -2,7 +2,8 @@ from __future__ import annotations
 import os, time, re
 from datetime import datetime, timedelta, timezone
 from typing import List, Optional, Dict, Any
-import httpx
+
+from .http_client import ACLIENT
 
 FINNHUB_TOKEN = os.getenv("FINNHUB_TOKEN") or os.getenv("FINNHUB_API_KEY") or ""
 BASE = "https://finnhub.io/api/v1"
@@ -22,15 +23,14 @@ def _now() -> float: return time.time()
 def _iso(dt: datetime) -> str:
     return dt.astimezone(timezone.utc).isoformat(timespec="seconds").replace("+00:00","Z")
 
-def _http_get(path: str, params: dict) -> dict | list:
+async def _http_get_async(path: str, params: dict) -> dict | list:
     if not FINNHUB_TOKEN:
         raise FHError("FINNHUB_TOKEN missing")
     url = f"{BASE}{path}"
     p   = dict(params or {}); p["token"] = FINNHUB_TOKEN
-    with httpx.Client(timeout=10.0, trust_env=False) as cli:
-        r = cli.get(url, params=p)
-        r.raise_for_status()
-        return r.json()
+    r = await ACLIENT.get(url, params=p, timeout=10.0)
+    r.raise_for_status()
+    return r.json()
 
 def _aliases_for(t: str) -> list[str]:
     t = t.upper()
@@ -61,18 +61,12 @@ def _score_headline(title: str, ticker: str) -> int:
     if any(ch in title for ch in (":", "—", "-")): score += 1
     return score
 
-def fetch_headlines(ticker: str, limit: int = 3) -> List[Dict[str, str]]:
-    """Return top N headlines relevant to ticker. [{title,publisher,ts,url}]"""
-    t = ticker.upper().strip()
-    if not t: return []
-    ck = (t, max(1, int(limit)))
-    hit = _cache_news.get(ck)
-    if hit and _now() - hit[0] < TTL_NEWS:
-        return hit[1][:ck[1]]
-
+def _news_range() -> dict:
     today = datetime.now(timezone.utc).date()
     frm   = today - timedelta(days=7)
-    raw = _http_get("/company-news", {"symbol": t, "from": frm.isoformat(), "to": today.isoformat()})
+    return {"from": frm.isoformat(), "to": today.isoformat()}
+
+def _headlines_from(raw: dict | list, t: str, limit: int) -> List[Dict[str, str]]:
     items: List[Dict[str,str]] = []
     if isinstance(raw, list):
         for n in raw:
@@ -89,39 +83,52 @@ def fetch_headlines(ticker: str, limit: int = 3) -> List[Dict[str, str]]:
             except Exception:
                 continue
     items.sort(key=lambda x: (_score_headline(x["title"], t), x.get("ts","")), reverse=True)
-    top = [h for h in items if h.get("title") and h.get("url")][:ck[1]]
+    return [h for h in items if h.get("title") and h.get("url")][:limit]
+
+async def fetch_headlines_async(ticker: str, limit: int = 3) -> List[Dict[str, str]]:
+    """Return top N headlines relevant to ticker. [{title,publisher,ts,url}]"""
+    t = ticker.upper().strip()
+    if not t: return []
+    ck = (t, max(1, int(limit)))
+    hit = _cache_news.get(ck)
+    if hit and _now() - hit[0] < TTL_NEWS:
+        return hit[1][:ck[1]]
+
+    raw = await _http_get_async("/company-news", {"symbol": t, **_news_range()})
+    top = _headlines_from(raw, t, ck[1])
     _cache_news[ck] = (_now(), top)
     return top
 
-def fetch_earnings_date(ticker: str) -> Optional[str]:
+def _earnings_from(data: dict | list) -> Optional[str]:
+    cal = data.get("earningsCalendar") if isinstance(data, dict) else None
+    if isinstance(cal, list):
+        for row in cal:
+            ds = str(row.get("date","")).strip()
+            if ds:
+                return f"{ds}T12:00:00Z"
+    return None
+
+async def fetch_earnings_date_async(ticker: str) -> Optional[str]:
     t = ticker.upper().strip()
     if not t: return None
     hit = _cache_earn.get(t)
     if hit and _now() - hit[0] < TTL_EARN:
         return hit[1]
     try:
-        data = _http_get("/calendar/earnings", {"symbol": t})
-        cal  = data.get("earningsCalendar") if isinstance(data, dict) else None
-        best = None
-        if isinstance(cal, list):
-            for row in cal:
-                ds = str(row.get("date","")).strip()
-                if ds:
-                    best = f"{ds}T12:00:00Z"
-                    break
+        best = _earnings_from(await _http_get_async("/calendar/earnings", {"symbol": t}))
         _cache_earn[t] = (_now(), best)
         return best
     except Exception:
         _cache_earn[t] = (_now(), None)
         return None
 
-def fetch_quote_finnhub(ticker: str) -> Dict[str, float]:
+async def fetch_quote_finnhub_async(ticker: str) -> Dict[str, float]:
     """Return {'last': float, 'bid': None, 'ask': None} with short TTL."""
     t = ticker.upper().strip()
     hit = _cache_quote.get(t)
     if hit and _now() - hit[0] < TTL_QUOTE:
         return hit[1]
-    data = _http_get("/quote", {"symbol": t})
+    data = await _http_get_async("/quote", {"symbol": t})
     last = float(data.get("c") or 0.0)
     out  = {"last": last, "bid": None, "ask": None}
     _cache_quote[t] = (_now(), out)
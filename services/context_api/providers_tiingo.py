@@ -1,9 +1,9 @@
 from __future__ import annotations
 import os, datetime as dt
-from typing import List
-import requests
-from .providers import Candle, Quote
-from .cache import ttl_cache
+import numpy as np
+from .providers import CandleSeries, Quote
+from .cache import attl_cache
+from .http_client import ACLIENT_ENV
 
 TIINGO_TOKEN = os.getenv("TIINGO_TOKEN")
 IEX_BASE = "https://api.tiingo.com/iex"
@@ -13,12 +13,13 @@ class TiError(RuntimeError):
         super().__init__(msg)
         self.status = status
 
-def _get(url: str, params: dict) -> dict | list:
+async def _aget(url: str, params: dict) -> dict | list:
     if not TIINGO_TOKEN:
-        throw = TiError("TIINGO_TOKEN not set", None)
-        raise throw
+        raise TiError("TIINGO_TOKEN not set", None)
     params = {**params, "token": TIINGO_TOKEN}
-    r = requests.get(url, params=params, timeout=8)
+    return _decode(await ACLIENT_ENV.get(url, params=params, timeout=8.0))
+
+def _decode(r) -> dict | list:
     if r.status_code >= 400:
         try:
             detail = r.json()
@@ -58,9 +59,7 @@ def _parse_iso_aware(s: str) -> dt.datetime:
         d = d.replace(tzinfo=dt.timezone.utc)
     return d.astimezone(dt.timezone.utc)
 
-@ttl_cache(ttl_seconds=2)
-def fetch_quote_tiingo(ticker: str) -> Quote:
-    data = _get(f"{IEX_BASE}/{ticker}", {})
+def _quote_from(data: dict | list) -> Quote:
     row = data[0] if isinstance(data, list) and data else (data if isinstance(data, dict) else {})
     last = _f(row.get("last", row.get("close", row.get("tngoLast"))), 0.0)
     bid  = _f(row.get("bidPrice", row.get("bid")), 0.0)
@@ -72,53 +71,55 @@ def fetch_quote_tiingo(ticker: str) -> Quote:
 
     return {"last": last, "bid": bid, "ask": ask, "ts": ts}
 
-@ttl_cache(ttl_seconds=60)
-def fetch_candles_tiingo(ticker: str, lookback_minutes: int = 120, freq: str = "1min") -> List[Candle]:
-    """
-    IEX intraday minute bars:
-    GET https://api.tiingo.com/iex/{ticker}/prices?startDate=YYYY-MM-DD&resampleFreq=1min&columns=open,high,low,close,volume,date
-    Relaxed strategy: if 'recent' filtering yields too few bars (closed market),
-    fall back to the latest N bars regardless of timestamp.
-    """
+def _candle_params(freq: str) -> dict:
     start_date = (dt.datetime.now(dt.timezone.utc) - dt.timedelta(days=1)).date().isoformat()
-    params = {
+    return {
         "startDate": start_date,
         "resampleFreq": freq,
         "columns": "open,high,low,close,volume,date",
     }
-    data = _get(f"{IEX_BASE}/{ticker}/prices", params)
-    if not isinstance(data, list) or not data:
-        return []
+
+def _col(values, dtype, n: int) -> np.ndarray:
+    a = np.fromiter(values, dtype=dtype, count=n)
+    a.flags.writeable = False  # shared through the TTL cache
+    return a
+
+def _candles_from(data: dict | list, lookback_minutes: int) -> CandleSeries:
+    if not isinstance(data, list):
+        data = []
 
     # First pass: try to keep only last ~lookback_minutes worth by UTC time
-    cutoff = dt.datetime.now(dt.timezone.utc) - dt.timedelta(minutes=lookback_minutes + 5)
-    filtered: List[Candle] = []
-    for row in data:
-        ts_raw = row.get("date", "")
-        dt_ts = _parse_iso_aware(ts_raw)
-        if dt_ts < cutoff:
-            continue
-        iso = dt_ts.isoformat(timespec="seconds").replace("+00:00", "Z")
-        o = _f(row.get("open"), 0.0)
-        h = _f(row.get("high"), 0.0)
-        l = _f(row.get("low"), 0.0)
-        c = _f(row.get("close"), 0.0)
-        v = _i(row.get("volume"), 0)
-        filtered.append({"ts": iso, "open": o, "high": h, "low": l, "close": c, "volume": v})
+    cutoff = (dt.datetime.now(dt.timezone.utc) - dt.timedelta(minutes=lookback_minutes + 5)).timestamp()
+    eps = [_parse_iso_aware(row.get("date", "")).timestamp() for row in data]
+    keep = [i for i, e in enumerate(eps) if e >= cutoff]
 
     # If we got too few bars (e.g., market closed), fall back to last N bars unfiltered
-    if len(filtered) < 6:
-        fallback: List[Candle] = []
-        for row in data[-max(60, lookback_minutes):]:
-            ts_raw = row.get("date", "")
-            dt_ts = _parse_iso_aware(ts_raw)
-            iso = dt_ts.isoformat(timespec="seconds").replace("+00:00", "Z")
-            o = _f(row.get("open"), 0.0)
-            h = _f(row.get("high"), 0.0)
-            l = _f(row.get("low"), 0.0)
-            c = _f(row.get("close"), 0.0)
-            v = _i(row.get("volume"), 0)
-            fallback.append({"ts": iso, "open": o, "high": h, "low": l, "close": c, "volume": v})
-        return fallback
-
-    return filtered
+    if len(keep) < 6:
+        keep = range(max(0, len(data) - max(60, lookback_minutes)), len(data))
+
+    rows = [data[i] for i in keep]
+    n = len(rows)
+    return {
+        "ts":     _col((eps[i] for i in keep), np.float64, n),
+        "open":   _col((_f(r.get("open"), 0.0) for r in rows), np.float64, n),
+        "high":   _col((_f(r.get("high"), 0.0) for r in rows), np.float64, n),
+        "low":    _col((_f(r.get("low"), 0.0) for r in rows), np.float64, n),
+        "close":  _col((_f(r.get("close"), 0.0) for r in rows), np.float64, n),
+        "volume": _col((_i(r.get("volume"), 0) for r in rows), np.int64, n),
+    }
+
+@attl_cache(ttl_seconds=2)
+async def fetch_quote_tiingo_async(ticker: str) -> Quote:
+    return _quote_from(await _aget(f"{IEX_BASE}/{ticker}", {}))
+
+@attl_cache(ttl_seconds=60)
+async def fetch_candles_tiingo_async(ticker: str, lookback_minutes: int = 120, freq: str = "1min") -> CandleSeries:
+    """
+    IEX intraday minute bars:
+    GET https://api.tiingo.com/iex/{ticker}/prices?startDate=YYYY-MM-DD&resampleFreq=1min&columns=open,high,low,close,volume,date
+    Relaxed strategy: if 'recent' filtering yields too few bars (closed market),
+    fall back to the latest N bars regardless of timestamp.
+    Returns struct-of-arrays bars (see CandleSeries).
+    """
+    data = await _aget(f"{IEX_BASE}/{ticker}/prices", _candle_params(freq))
+    return _candles_from(data, lookback_minutes)
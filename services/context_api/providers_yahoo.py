@@ -1,7 +1,9 @@
 from __future__ import annotations
 import time, re
 from typing import List, Dict, Tuple
-import requests, feedparser
+import feedparser
+
+from .http_client import ACLIENT_ENV
 
 TTL_S = 90.0
 _cache: dict[Tuple[str, int], Tuple[float, List[Dict[str, str]]]] = {}
@@ -34,20 +36,8 @@ def _score(title: str, ticker: str) -> int:
             score += 3
     return score
 
-def fetch_headlines_yahoo(ticker: str, limit: int = 3) -> List[Dict[str, str]]:
-    t = (ticker or "").upper().strip()
-    if not t:
-        return []
-    ck = (t, int(limit or 3))
-    now = time.time()
-    hit = _cache.get(ck)
-    if hit and now - hit[0] < TTL_S:
-        return hit[1][:ck[1]]
-
-    url = f"https://finance.yahoo.com/rss/headline?s={t}"
-    resp = requests.get(url, headers={"User-Agent":"Mozilla/5.0"}, timeout=10)
-    resp.raise_for_status()
-    feed = feedparser.parse(resp.content)
+def _items_from(content: bytes, t: str, limit: int) -> List[Dict[str, str]]:
+    feed = feedparser.parse(content)
 
     items: List[Dict[str, str]] = []
     for e in getattr(feed, "entries", []):
@@ -59,6 +49,21 @@ def fetch_headlines_yahoo(ticker: str, limit: int = 3) -> List[Dict[str, str]]:
         items.append({"title": title, "publisher": "Yahoo", "ts": ts, "url": link})
 
     items.sort(key=lambda x: _score(x["title"], t), reverse=True)
-    out = items[:ck[1]]
+    return items[:limit]
+
+async def fetch_headlines_yahoo_async(ticker: str, limit: int = 3) -> List[Dict[str, str]]:
+    t = (ticker or "").upper().strip()
+    if not t:
+        return []
+    ck = (t, int(limit or 3))
+    now = time.time()
+    hit = _cache.get(ck)
+    if hit and now - hit[0] < TTL_S:
+        return hit[1][:ck[1]]
+
+    url = f"https://finance.yahoo.com/rss/headline?s={t}"
+    resp = await ACLIENT_ENV.get(url, headers={"User-Agent":"Mozilla/5.0"}, timeout=10.0)
+    resp.raise_for_status()
+    out = _items_from(resp.content, t, ck[1])
     _cache[ck] = (now, out)
     return out
@@ -0,0 +1,40 @@
+import numpy as np
+import pytest
+
+from services.context_api import _fastind as K
+from services.context_api import features as F
+from services.context_api import indicators as ref
+from services.context_api.providers_tiingo import _col
+
+KERNELS = (K.atr_norm_np, K.ret_np, K.above_sma_np)
+
+def _series(n: int, seed: int):
+    rng = np.random.default_rng(seed)
+    c = 100.0 + np.cumsum(rng.normal(0.0, 0.5, n))
+    return c + rng.uniform(0.0, 1.0, n), c - rng.uniform(0.0, 1.0, n), c
+
+@pytest.mark.parametrize("n,seed", [(21, 0), (60, 1), (120, 2), (300, 3)])
+def test_kernels_match_reference(n, seed):
+    h, l, c = _series(n, seed)
+    assert K.atr_norm_np(h, l, c, 20) == pytest.approx(ref.atr_normalized(h, l, c, 20), rel=1e-12)
+    for delta in (1, 5):
+        assert K.ret_np(c, delta) == pytest.approx(ref.ret_pct(c, delta), rel=1e-12)
+    assert bool(K.above_sma_np(c, 20)) == ref.above_sma20(c)
+
+def test_kernels_match_reference_on_synthetic_bars():
+    h, l, c = F._SYN_HIGHS, F._SYN_LOWS, F._SYN_CLOSES
+    assert K.atr_norm_np(h, l, c, 20) == pytest.approx(ref.atr_normalized(h, l, c, 20), rel=1e-12)
+    assert K.ret_np(c, 5) == pytest.approx(ref.ret_pct(c, 5), rel=1e-12)
+    assert bool(K.above_sma_np(c, 20)) == ref.above_sma20(c)
+
+def test_warm_covers_live_array_types():
+    pytest.importorskip("numba")
+    K.warm_kernels()
+    before = [len(k.signatures) for k in KERNELS]
+
+    closes = [100.0 + 0.1 * i for i in range(60)]
+    ro = _col(iter(closes), np.float64, len(closes))    # cached candles are read-only
+    F._features_from_np(ro, ro, ro, 1.0)
+    F._features_from_np(ro[-10:], ro[-10:], ro[-10:], 1.0)  # short series: edge-padded copy
+
+    assert [len(k.signatures) for k in KERNELS] == before
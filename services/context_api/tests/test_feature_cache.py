@@ -0,0 +1,106 @@
+import asyncio
+import types
+import pytest
+from fastapi.testclient import TestClient
+
+from services.context_api import app as A
+from services.context_api import cache as C
+from services.context_api import features as F
+
+class Clock:
+    def __init__(self, t: float = 1_000_000.0):
+        self.t = t
+
+    def time(self) -> float:
+        return self.t
+
+@pytest.fixture
+def env(monkeypatch):
+    """Live mode, fake clock, and a counting _build_live that stamps its build time."""
+    monkeypatch.setenv("LIVE_PROVIDERS", "1")
+    clock = Clock()
+    monkeypatch.setattr(C, "time", types.SimpleNamespace(time=clock.time))
+    C._CACHE.clear(); F._REFRESHING.clear(); F._LOCKS.clear()
+    builds = []
+
+    async def build(ticker):
+        builds.append(ticker)
+        await asyncio.sleep(0.01)
+        if ticker == "BOOM":
+            raise RuntimeError("provider blew up")
+        payload = {"n": len(builds), "ts": F.iso_now(clock.t)}
+        C.put_cached(ticker, payload)
+        return payload
+
+    monkeypatch.setattr(F, "_build_live", build)
+    yield clock, builds
+    C._CACHE.clear(); F._REFRESHING.clear(); F._LOCKS.clear()
+
+async def _settle():
+    while F._BACKGROUND:
+        await asyncio.gather(*F._BACKGROUND)
+
+def test_fresh_hit_skips_build(env):
+    clock, builds = env
+
+    async def main():
+        a = await F.build_features_for("nvda")
+        clock.t += C.TTL_S - 1
+        b = await F.build_features_for("NVDA")
+        return a, b
+
+    a, b = asyncio.run(main())
+    assert builds == ["nvda"] and b is a and b["_cache"]["stale"] is False
+
+def test_stale_hit_serves_old_and_refreshes_once(env):
+    clock, builds = env
+
+    async def main():
+        await F.build_features_for("NVDA")
+        clock.t += C.TTL_S + 1
+        served = await asyncio.gather(*[F.build_features_for("NVDA") for _ in range(10)])
+        assert len(F._REFRESHING) == 1              # ten stale hits, one background refresh
+        await _settle()
+        return served, await F.build_features_for("NVDA")
+
+    served, after = asyncio.run(main())
+    assert all(p["n"] == 1 and p["_cache"]["stale"] for p in served)
+    assert len(builds) == 2 and after["n"] == 2
+    assert F._REFRESHING == set() and F._LOCKS == {}
+
+def test_past_hard_ttl_blocks_on_rebuild(env):
+    clock, builds = env
+
+    async def main():
+        await F.build_features_for("NVDA")
+        clock.t += C.HARD_TTL_S + 1
+        return await F.build_features_for("NVDA")
+
+    assert asyncio.run(main())["n"] == 2
+    assert len(builds) == 2 and F._REFRESHING == set()
+
+def test_concurrent_misses_single_flight_and_release_lock(env):
+    _, builds = env
+
+    async def main():
+        res = await asyncio.gather(*[F.build_features_for(t) for t in ["NVDA"] * 20 + ["AMD"] * 5])
+        assert F._LOCKS == {}
+        errs = await asyncio.gather(*[F.build_features_for("BOOM") for _ in range(3)], return_exceptions=True)
+        assert all(isinstance(e, RuntimeError) for e in errs)
+        assert F._LOCKS == {}                       # released even when the build raises
+        return res
+
+    res = asyncio.run(main())
+    assert builds.count("NVDA") == 1 and builds.count("AMD") == 1
+    assert len({id(p) for p in res[:20]}) == 1
+
+def test_features_v2_keeps_build_ts(env):
+    clock, _ = env
+    with TestClient(A.app) as client:
+        first = client.get("/api/features/v2", params={"ticker": "NVDA"}).json()
+        clock.t += C.TTL_S + 1
+        stale = client.get("/api/features/v2", params={"ticker": "NVDA"}).json()
+
+    assert first["ts"] == F.iso_now(1_000_000.0) and first["ticker"] == "NVDA"
+    assert stale["ts"] == first["ts"]               # age stays visible to the gateway
+    assert "ticker" not in C._CACHE["NVDA"][1]      # cached entry not mutated
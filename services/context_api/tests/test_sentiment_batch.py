@@ -0,0 +1,114 @@
+import asyncio
+import httpx
+import pytest
+
+from services.context_api import features as F
+
+NEUTRAL = (0.0, 0.05)
+
+@pytest.fixture(autouse=True)
+def _clean_state(monkeypatch):
+    monkeypatch.setattr(F, "SENT_BATCH_WINDOW_S", 0.01)
+    F._SENT_PENDING.clear()
+    yield
+    F._SENT_PENDING.clear()
+
+def _fake_post(monkeypatch, handler):
+    """Route ACLIENT.post through handler(url, json) -> httpx.Response; returns the call log."""
+    calls = []
+
+    async def post(url, json=None, **kw):
+        calls.append((url, json))
+        resp = handler(url, json)
+        if isinstance(resp, Exception):
+            raise resp
+        resp.request = httpx.Request("POST", url)
+        return resp
+
+    monkeypatch.setattr(F.ACLIENT, "post", post)
+    return calls
+
+def _heads(t):
+    return [{"title": f"{t} headline"}]
+
+def test_concurrent_tickers_share_one_post(monkeypatch):
+    def handler(url, body):
+        return httpx.Response(200, json={"groups": [
+            {"id": g["id"], "mean": 0.1 * (i + 1), "std": 0.01} for i, g in enumerate(body["groups"])
+        ]})
+    calls = _fake_post(monkeypatch, handler)
+
+    async def main():
+        return await asyncio.wait_for(asyncio.gather(
+            *[F._sent_from_headlines(t, _heads(t)) for t in ("NVDA", "AMD", "TSLA")]), 1)
+
+    res = asyncio.run(main())
+    assert len(calls) == 1
+    assert calls[0][0].endswith("/api/sentiment_batch")
+    assert [g["id"] for g in calls[0][1]["groups"]] == ["NVDA", "AMD", "TSLA"]
+    assert res == [(0.1, 0.01), (0.2, 0.01), (pytest.approx(0.3), 0.01)]
+
+def test_malformed_group_falls_back_to_neutral(monkeypatch):
+    _fake_post(monkeypatch, lambda url, body: httpx.Response(200, json={"groups": [
+        {"mean": 0.3, "std": 0.1}, {"mean": None}, "junk"]}))
+
+    async def main():
+        return await asyncio.wait_for(asyncio.gather(
+            *[F._sent_from_headlines(t, _heads(t)) for t in "ABCD"]), 1)
+
+    assert asyncio.run(main()) == [(0.3, 0.1), NEUTRAL, NEUTRAL, NEUTRAL]
+
+def test_transport_error_resolves_neutral(monkeypatch):
+    _fake_post(monkeypatch, lambda url, body: httpx.ConnectError("refused"))
+
+    async def main():
+        return await asyncio.wait_for(asyncio.gather(
+            *[F._sent_from_headlines(t, _heads(t)) for t in "AB"]), 1)
+
+    assert asyncio.run(main()) == [NEUTRAL, NEUTRAL]
+    assert F._SENT_PENDING == []
+
+def test_cancel_during_window_releases_waiters(monkeypatch):
+    monkeypatch.setattr(F, "SENT_BATCH_WINDOW_S", 5.0)
+    monkeypatch.setattr(F, "_BUILDING", {"A", "B"})  # other builds in flight: window applies
+    calls = _fake_post(monkeypatch, lambda url, body: httpx.Response(200, json={"mean": 0.5, "std": 0.02}))
+
+    async def main():
+        waiters = [asyncio.create_task(F._sent_from_headlines(t, _heads(t))) for t in "AB"]
+        await asyncio.sleep(0.01)               # both queued, flush asleep in its window
+        flushes = list(F._BACKGROUND)
+        assert len(flushes) == 1
+        flushes[0].cancel()
+        first = await asyncio.wait_for(asyncio.gather(*waiters), 1)
+        assert F._SENT_PENDING == []
+        # queue was drained, so the next build spawns a fresh flush
+        F._BUILDING.clear()
+        again = await asyncio.wait_for(F._sent_from_headlines("C", _heads("C")), 1)
+        return first, again
+
+    first, again = asyncio.run(main())
+    assert first == [NEUTRAL, NEUTRAL]
+    assert again == (0.5, 0.02)
+    assert [u.rsplit("/", 1)[1] for u, _ in calls] == ["sentiment"]
+
+def test_missing_batch_route_falls_back_to_per_ticker_posts(monkeypatch):
+    def handler(url, body):
+        if url.endswith("/api/sentiment_batch"):
+            return httpx.Response(404, json={"detail": "Not Found"})
+        return httpx.Response(200, json={"mean": 0.4 if "NVDA" in body["texts"][0] else -0.4, "std": 0.03})
+    calls = _fake_post(monkeypatch, handler)
+
+    async def main():
+        return await asyncio.wait_for(asyncio.gather(
+            *[F._sent_from_headlines(t, _heads(t)) for t in ("NVDA", "TSLA")]), 1)
+
+    assert asyncio.run(main()) == [(0.4, 0.03), (-0.4, 0.03)]
+    assert [u.rsplit("/", 1)[1] for u, _ in calls] == ["sentiment_batch", "sentiment", "sentiment"]
+
+def test_lone_build_skips_window_and_batch_route(monkeypatch):
+    monkeypatch.setattr(F, "SENT_BATCH_WINDOW_S", 5.0)
+    monkeypatch.setattr(F, "_BUILDING", {"NVDA"})
+    calls = _fake_post(monkeypatch, lambda url, body: httpx.Response(200, json={"mean": 0.2, "std": 0.04}))
+
+    assert asyncio.run(asyncio.wait_for(F._sent_from_headlines("NVDA", _heads("NVDA")), 1)) == (0.2, 0.04)
+    assert [u.rsplit("/", 1)[1] for u, _ in calls] == ["sentiment"]
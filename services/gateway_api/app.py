@@ -1,7 +1,8 @@
 from __future__ import annotations
 from typing import Optional, Dict, Any, List
 from fastapi import FastAPI, HTTPException, Query
-import os, httpx, time
+from fastapi.responses import ORJSONResponse
+import asyncio, os, time, httpx, orjson
 from datetime import datetime, timezone
 
 CTX_URL = os.getenv("CTX_URL", "http://127.0.0.1:8012")
@@ -11,50 +12,88 @@ TIMEOUT = float(os.getenv("GATEWAY_TIMEOUT_S", "8"))
 RETRIES = int(os.getenv("GATEWAY_RETRIES", "2"))
 DELAY   = float(os.getenv("GATEWAY_RETRY_DELAY_S", "0.25"))
 
-app = FastAPI(title="MIDAS Gateway API", version="v1")
+app = FastAPI(title="MIDAS Gateway API", version="v1", default_response_class=ORJSONResponse)
+
+# One pooled client for all downstream hops (keep-alive, no per-call handshake)
+_CLIENT = httpx.AsyncClient(
+    timeout=TIMEOUT,
+    trust_env=False,
+    limits=httpx.Limits(max_keepalive_connections=64, max_connections=128),
+)
+
+@app.on_event("shutdown")
+async def _close_client():
+    await _CLIENT.aclose()
 
 def iso_now() -> str:
-    return datetime.now(timezone.utc).isoformat(timespec="seconds").replace("+00:00","Z")
+    return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
 
 def _parse_iso(s: str) -> Optional[datetime]:
     if not s: return None
     try: return datetime.fromisoformat(s.replace("Z","+00:00")).astimezone(timezone.utc)
     except Exception: return None
 
-def _get_json(url: str, params: dict | None = None) -> dict:
+async def _aget_json(url: str, params: dict | None = None) -> dict:
     last_exc: Optional[Exception] = None
-    with httpx.Client(timeout=TIMEOUT, trust_env=False) as client:
-        for _ in range(RETRIES + 1):
-            try:
-                r = client.get(url, params=params)
-                r.raise_for_status()
-                return r.json()
-            except Exception as e:
-                last_exc = e
-                time.sleep(DELAY)
+    for i in range(RETRIES + 1):
+        try:
+            r = await _CLIENT.get(url, params=params)
+            r.raise_for_status()
+            return orjson.loads(r.content)
+        except Exception as e:
+            last_exc = e
+            if i < RETRIES:
+                await asyncio.sleep(DELAY * (2 ** i))
     raise HTTPException(status_code=502, detail=f"GET {url} failed: {last_exc}")
 
-def _post_json(url: str, payload: dict) -> dict:
+async def _apost_json(url: str, payload: dict) -> dict:
     last_exc: Optional[Exception] = None
-    with httpx.Client(timeout=TIMEOUT, trust_env=False) as client:
-        for _ in range(RETRIES + 1):
-            try:
-                r = client.post(url, json=payload)
-                r.raise_for_status()
-                return r.json()
-            except Exception as e:
-                last_exc = e
-                time.sleep(DELAY)
+    for i in range(RETRIES + 1):
+        try:
+            r = await _CLIENT.post(url, json=payload)
+            r.raise_for_status()
+            return orjson.loads(r.content)
+        except Exception as e:
+            last_exc = e
+            if i < RETRIES:
+                await asyncio.sleep(DELAY * (2 ** i))
     raise HTTPException(status_code=502, detail=f"POST {url} failed: {last_exc}")
 
+# ------- One-liner (same output as context /api/one_liner, composed in-process) -------
+
+_STRATEGY_PHRASES: dict[str, str] = {
+    "IRON_CONDOR": "Range-bound, IV watch",
+    "DEBIT_CALL": "Bullish, defined risk",
+    "DEBIT_PUT": "Bearish, defined risk",
+    "COVERED_CALL": "Income; upside capped",
+    "NO_ACTION": "Signal unclear",
+}
+_LEN_LIMIT = 180
+_SUFFIX_BY_N = ("", " ([1])", " ([1][2])", " ([1][2][3])")  # by count of linked refs
+
+def _build_index_suffix(refs: List[Optional[Dict[str, str]]]) -> tuple[str, List[Dict[str, Any]]]:
+    """Return text like '([1][2][3])' and an array mapping of numbers to urls."""
+    urls = [url for slot in (refs or [])[:3] if slot and (url := slot.get("url"))]
+    return _SUFFIX_BY_N[len(urls)], [{"n": n, "url": u} for n, u in enumerate(urls, 1)]
+
+def _one_liner(cls: str, publisher: str, refs: List[Optional[Dict[str, str]]]) -> Dict[str, Any]:
+    phrase = _STRATEGY_PHRASES.get(cls, "Review setup")
+    publisher = publisher or "News"
+    suffix, refs_numbers = _build_index_suffix(refs)
+    fixed = len(phrase) + len(". Source: ") + len(" —") + len(suffix)
+    if fixed + len(publisher) > _LEN_LIMIT:
+        publisher = publisher[:max(0, _LEN_LIMIT - fixed - 1)] + "…"
+    text = "".join((phrase, ". Source: ", publisher, " —", suffix))
+    return {"text": text, "refs_numbers": refs_numbers}
+
 @app.get("/healthz")
 def healthz():
     return {"status":"ok","service":"gateway","version":"v1","ts":iso_now(),"CTX_URL":CTX_URL,"REC_URL":REC_URL}
 
 @app.get("/api/run")
-def run(t: str = Query(..., alias="ticker")) -> Dict[str, Any]:
+async def run(t: str = Query(..., alias="ticker")) -> Dict[str, Any]:
     # 1) features from context
-    ctx = _get_json(f"{CTX_URL}/api/features/v2", params={"ticker": t})
+    ctx = await _aget_json(f"{CTX_URL}/api/features/v2", params={"ticker": t})
     features: Dict[str, Any] = ctx.get("features", {}) or {}
     top_headline: Optional[Dict[str, str]] = ctx.get("top_headline")
     feature_note = ctx.get("error")
@@ -64,21 +103,11 @@ def run(t: str = Query(..., alias="ticker")) -> Dict[str, Any]:
     refs_sources: List[str] = ctx.get("refs_sources") or []
 
     # 2) recommendation (top-level fields)
-    rec = _post_json(f"{REC_URL}/api/recommend", features)
+    rec = await _apost_json(f"{REC_URL}/api/recommend", features)
 
-    # 3) one-liner build (pass refs for ([1][2][3]))
+    # 3) one-liner build (refs give ([1][2][3])); pure string work, so no CTX round trip
     headline = top_headline or {"title": "", "publisher": "", "url": ""}
-    try:
-        one = _post_json(f"{CTX_URL}/api/one_liner", {
-            "class_":     rec.get("class", "NO_ACTION"),
-            "confidence": rec.get("confidence", 0.0),
-            "title":      headline.get("title", ""),
-            "publisher":  headline.get("publisher", ""),
-            "url":        headline.get("url", ""),
-            "refs":       refs,   # list of {title,publisher,url} or None slots
-        })
-    except HTTPException:
-        one = {"text": f"{rec.get('class','NO_ACTION')} · {int(rec.get('confidence',0)*100)}% confidence"}
+    one = _one_liner(rec.get("class", "NO_ACTION"), headline.get("publisher", ""), refs)
 
     # 4) compute age
     now = datetime.now(timezone.utc)
@@ -0,0 +1,26 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from services.context_api.app import app as ctx_app
+from services.gateway_api.app import _one_liner
+
+REF = {"title": "t", "publisher": "Reuters", "url": "https://example.com/a"}
+REF2 = {"title": "t2", "publisher": "Yahoo", "url": "https://example.com/b"}
+LONG = "Very Long Publisher Name " * 12
+
+CASES = [
+    ("no refs",            "DEBIT_CALL",  "Reuters", []),
+    ("null refs",          "DEBIT_PUT",   "Reuters", None),
+    ("None slots",         "IRON_CONDOR", "",        [REF, None, REF2]),
+    ("all None",           "NO_ACTION",   "Yahoo",   [None, None, None]),
+    ("over-long pub",      "COVERED_CALL", LONG,     [REF, REF2, {"url": "https://example.com/c"}]),
+    ("unknown class",      "STRANGLE",    "Reuters", [REF]),
+]
+
+@pytest.mark.parametrize("cls,publisher,refs", [c[1:] for c in CASES], ids=[c[0] for c in CASES])
+def test_gateway_one_liner_matches_context(cls, publisher, refs):
+    client = TestClient(ctx_app)
+    r = client.post("/api/one_liner", json={"class_": cls, "confidence": 0.7, "publisher": publisher, "refs": refs})
+    assert r.status_code == 200, r.text
+    assert _one_liner(cls, publisher, refs) == r.json()
+    assert len(r.json()["text"]) <= 180
@@ -52,6 +52,20 @@ class SentOut(BaseModel):
     samples: List[float]
     engine: str  # "finbert" or "lexicon"
 
+class SentGroup(BaseModel):
+    id: str           # caller's label, e.g. ticker
+    texts: List[str]
+
+class SentBatchIn(BaseModel):
+    groups: List[SentGroup]
+
+class SentGroupOut(SentOut):
+    id: str
+
+class SentBatchOut(BaseModel):
+    ts: str
+    groups: List[SentGroupOut]  # same order as the request
+
 def _iso_now() -> str:
     return datetime.now(timezone.utc).isoformat(timespec="seconds").replace("+00:00","Z")
 
@@ -72,16 +86,11 @@ def healthz():
     engine = "finbert" if get_pipe() is not None else "lexicon"
     return {"status": "ok", "service": "sentiment", "version": "v1", "ttl_s": TTL, "engine": engine}
 
-@app.post("/api/sentiment", response_model=SentOut)
-def analyze(x: SentIn):
-    if not x.texts or not isinstance(x.texts, list):
-        raise HTTPException(400, "texts required")
-    # Normalize input texts
-    key = tuple(t.strip() for t in x.texts if isinstance(t, str) and t.strip())
-    if not key:
-        raise HTTPException(400, "texts required")
+def _normalize(texts: List[str]) -> Tuple[str, ...]:
+    return tuple(t.strip() for t in texts if isinstance(t, str) and t.strip())
 
-    now = time.time()
+def _score(key: Tuple[str, ...], now: float) -> dict:
+    """Score normalized texts, honoring the TTL cache."""
     hit = _CACHE.get(key)
     if hit and (now - hit[0]) < TTL:
         return hit[1]
@@ -103,5 +112,25 @@ def analyze(x: SentIn):
     std  = math.sqrt(var)
 
     out = SentOut(ts=_iso_now(), n=n, mean=float(mean), std=float(std), samples=[float(v) for v in samples], engine=engine).dict()
-    _CACHE[key] = (now, out)
-    return out
\ No newline at end of file
+    if key:
+        _CACHE[key] = (now, out)
+    return out
+
+@app.post("/api/sentiment", response_model=SentOut)
+def analyze(x: SentIn):
+    if not x.texts or not isinstance(x.texts, list):
+        raise HTTPException(400, "texts required")
+    # Normalize input texts
+    key = _normalize(x.texts)
+    if not key:
+        raise HTTPException(400, "texts required")
+    return _score(key, time.time())
+
+@app.post("/api/sentiment_batch", response_model=SentBatchOut)
+def analyze_batch(x: SentBatchIn):
+    """Score several text groups (e.g. one per ticker) in one round trip."""
+    if not x.groups:
+        raise HTTPException(400, "groups required")
+    now = time.time()
+    groups = [{"id": g.id, **_score(_normalize(g.texts), now)} for g in x.groups]
+    return {"ts": _iso_now(), "groups": groups}